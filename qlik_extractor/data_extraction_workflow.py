@@ -11,12 +11,13 @@ Date: 2024
 import os
 import sys
 from pathlib import Path
+from typing import Any, Dict
 import logging
 
 # Add the parent directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from qlik_extractor.qvd_processor import QVDProcessor
+from qlik_extractor.qvd_processor import QVDProcessor, quote_identifier
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -31,14 +32,18 @@ class DataExtractionWorkflow:
     optimized data storage in DuckDB.
     """
     
-    def __init__(self, project_root: str = "."):
+    def __init__(self, project_root: str = ".", emit_parquet: bool = False, prewarm: bool = False):
         """
         Initialize the data extraction workflow.
         
         Args:
             project_root (str): Root directory of the project
+            emit_parquet (bool): Also export processed tables as Parquet files
+            prewarm (bool): Prewarm tables before verification queries
+                (downloads the ``cache_prewarm`` DuckDB extension)
         """
         self.project_root = Path(project_root)
+        self.emit_parquet = emit_parquet
         self.data_dir = self.project_root / "data"
         self.csv_exports_dir = self.data_dir / "csv_exports"
         self.processed_dir = self.data_dir / "processed"
@@ -49,7 +54,9 @@ class DataExtractionWorkflow:
         # Initialize processor
         self.processor = QVDProcessor(
             data_dir=str(self.csv_exports_dir),
-            output_dir=str(self.processed_dir)
+            output_dir=str(self.processed_dir),
+            emit_parquet=self.emit_parquet,
+            prewarm=prewarm
         )
         
         logger.info("Data Extraction Workflow initialized")
@@ -63,9 +70,10 @@ class DataExtractionWorkflow:
             self.data_dir,
             self.csv_exports_dir,
             self.processed_dir,
-            self.processed_dir / "parquet",
             self.processed_dir / "metadata"
         ]
+        if self.emit_parquet:
+            directories.append(self.processed_dir / "parquet")
         
         for directory in directories:
             directory.mkdir(parents=True, exist_ok=True)
@@ -122,8 +130,9 @@ class DataExtractionWorkflow:
             for file_info in results['files']:
                 if file_info['status'] == 'success':
                     print(f"  ✅ {file_info['file_name']}: {file_info['rows']} rows, {file_info['columns']} columns")
-                    print(f"     Memory savings: {file_info['memory_savings']:,} bytes")
-                    print(f"     Parquet size: {file_info['parquet_size_mb']:.2f} MB")
+                    if 'parquet_size_mb' in file_info:
+                        print(f"     Parquet size: {file_info['parquet_size_mb']:.2f} MB")
+                        print(f"     Compression ratio: {file_info['compression_ratio']:.1f}x")
                 else:
                     print(f"  ❌ {file_info['file_name']}: {file_info['error']}")
             
@@ -140,8 +149,11 @@ class DataExtractionWorkflow:
         print("="*60)
         
         try:
+            # Processing is finished, so verify over a read-only connection
+            read_conn = self.processor.open_read_connection()
+            
             # Get database tables
-            tables = self.processor.conn.execute("SHOW TABLES").fetchall()
+            tables = read_conn.execute("SHOW TABLES").fetchall()
             
             if not tables:
                 print("❌ No tables found in database")
@@ -149,16 +161,21 @@ class DataExtractionWorkflow:
             
             print(f"✅ Found {len(tables)} tables in DuckDB database")
             
+            # Warm the buffer pool so the queries below don't pay cold-start I/O
+            self.processor.prewarm_tables([table[0] for table in tables])
+            
             # Show table information
             print("\nTable Information:")
+            table_infos = []
             for table in tables:
                 table_name = table[0]
                 info = self.processor.get_table_info(table_name)
+                table_infos.append(info)
                 print(f"  📊 {table_name}: {info['row_count']} rows, {len(info['columns'])} columns")
             
             # Test queries
             print("\nTesting Queries:")
-            self._test_basic_queries()
+            self._test_basic_queries(table_infos[0])
             
             return True
             
@@ -166,30 +183,31 @@ class DataExtractionWorkflow:
             print(f"❌ Verification failed: {e}")
             return False
     
-    def _test_basic_queries(self):
-        """Test basic queries on the processed data."""
+    def _test_basic_queries(self, table_info: Dict[str, Any]):
+        """
+        Test basic queries on the processed data.
+        
+        Args:
+            table_info (Dict): Table information from ``get_table_info``
+        """
         try:
-            # Get first table for testing
-            tables = self.processor.conn.execute("SHOW TABLES").fetchall()
-            if not tables:
-                return
-            
-            table_name = tables[0][0]
+            table_name = table_info['table_name']
             
-            # Test 1: Basic select
+            # Test 1: Basic select, projecting only a few named columns
             print(f"\n  🔍 Testing basic select from {table_name}:")
-            result = self.processor.query_data(f"SELECT * FROM {table_name} LIMIT 3")
-            if not result.empty:
-                print(f"     ✅ Retrieved {len(result)} rows")
-                print(f"     Columns: {list(result.columns)}")
+            columns = ', '.join(quote_identifier(col['name']) for col in table_info['columns'][:3])
+            result = self.processor.query_arrow(f"SELECT {columns} FROM {table_name} LIMIT 3")
+            if result.num_rows:
+                print(f"     ✅ Retrieved {result.num_rows} rows")
+                print(f"     Columns: {result.column_names}")
             else:
                 print("     ❌ No data returned")
             
             # Test 2: Count query
             print(f"\n  🔢 Testing count query on {table_name}:")
-            count_result = self.processor.query_data(f"SELECT COUNT(*) as total_rows FROM {table_name}")
-            if not count_result.empty:
-                total_rows = count_result.iloc[0]['total_rows']
+            count_result = self.processor.query_arrow(f"SELECT COUNT(*) as total_rows FROM {table_name}")
+            if count_result.num_rows:
+                total_rows = count_result.column('total_rows')[0].as_py()
                 print(f"     ✅ Total rows: {total_rows:,}")
             
         except Exception as e:
@@ -207,7 +225,8 @@ class DataExtractionWorkflow:
         print("3. 🚀 Deploy your Python BI solution")
         print(f"\nYour data is now available in: {self.processed_dir}")
         print(f"Database file: {self.processor.duckdb_path}")
-        print(f"Parquet files: {self.processed_dir / 'parquet'}")
+        if self.emit_parquet:
+            print(f"Parquet files: {self.processed_dir / 'parquet'}")
     
     def run_complete_workflow(self):
         """Run the complete data extraction workflow."""
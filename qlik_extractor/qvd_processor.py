@@ -2,26 +2,49 @@
 QVD File Processor
 
 This module processes QVD files exported from Qlik Sense by converting them
-to CSV format and then processing them with pandas for the Python BI stack.
+to CSV format and then loading them into DuckDB for the Python BI stack.
 
 Author: vitaBI Team
 Date: 2024
 """
 
 import os
+import re
+import csv
 import pandas as pd
+import pyarrow as pa
 import duckdb
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import json
 from datetime import datetime
 
+try:
+    import psutil
+except ImportError:  # optional: only used to size DuckDB's memory_limit
+    psutil = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def quote_identifier(name: str) -> str:
+    """
+    Quote a column or table name for use in DuckDB SQL.
+    
+    Args:
+        name (str): Identifier, which may contain double quotes
+        
+    Returns:
+        str: Double-quoted identifier with embedded quotes doubled
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
 class QVDProcessor:
     """
     Processes QVD files exported from Qlik Sense.
@@ -30,30 +53,143 @@ class QVDProcessor:
     optimized formats for the Python BI stack.
     """
     
-    def __init__(self, data_dir: str = "./data", output_dir: str = "./data/processed"):
+    def __init__(self, data_dir: str = "./data", output_dir: str = "./data/processed",
+                 emit_parquet: bool = False, threads: Optional[int] = None,
+                 memory_limit: Optional[str] = None, preserve_insertion_order: bool = False,
+                 enable_object_cache: bool = True, prewarm: bool = False):
         """
         Initialize the QVD processor.
         
         Args:
             data_dir (str): Directory containing QVD/CSV files
             output_dir (str): Directory for processed files
+            emit_parquet (bool): Also export each table as Parquet for
+                external consumers. DuckDB's own storage is the query target.
+            threads (int, optional): DuckDB worker threads, defaults to all cores
+            memory_limit (str, optional): DuckDB memory limit (e.g. '8GB'),
+                defaults to 70% of available memory when psutil is installed
+            preserve_insertion_order (bool): Keep row order on load; disabling
+                it lets DuckDB parallelize loads with less memory
+            enable_object_cache (bool): Cache Parquet metadata between queries
+            prewarm (bool): Let ``prewarm_tables`` use the ``cache_prewarm``
+                community extension, which is downloaded on first use
         """
         self.data_dir = Path(data_dir)
         self.output_dir = Path(output_dir)
         self.duckdb_path = self.output_dir / "analytical_data.db"
+        self.emit_parquet = emit_parquet
+        self.read_conn = None
+        self.prewarm = prewarm
+        self._prewarm_available = None
+        
+        if threads is None:
+            threads = os.cpu_count() or 1
+        if memory_limit is None and psutil is not None:
+            available_mb = int(psutil.virtual_memory().available * 0.7 / (1024 * 1024))
+            memory_limit = f"{available_mb}MB"
+        self._duckdb_settings = {
+            'threads': int(threads),
+            'memory_limit': memory_limit,
+            'preserve_insertion_order': preserve_insertion_order,
+            'enable_object_cache': enable_object_cache
+        }
         
         # Create directories if they don't exist
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        (self.output_dir / "parquet").mkdir(exist_ok=True)
+        if self.emit_parquet:
+            (self.output_dir / "parquet").mkdir(exist_ok=True)
         (self.output_dir / "metadata").mkdir(exist_ok=True)
         
         # Initialize DuckDB connection
         self.conn = duckdb.connect(str(self.duckdb_path))
+        self._configure_connection(self.conn)
+        
+        # Per-file processing log, kept out of the main schema so it is not
+        # listed alongside the data tables
+        self.conn.execute("CREATE SCHEMA IF NOT EXISTS metadata")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS metadata.processing_log (
+                file_name VARCHAR PRIMARY KEY,
+                rows BIGINT,
+                columns INTEGER,
+                parquet_size_mb DOUBLE,
+                processed_at TIMESTAMP,
+                status VARCHAR,
+                error VARCHAR
+            )
+        """)
         
         logger.info(f"QVD Processor initialized")
         logger.info(f"Data directory: {self.data_dir}")
         logger.info(f"Output directory: {self.output_dir}")
     
+    def _configure_connection(self, conn: duckdb.DuckDBPyConnection):
+        """
+        Apply DuckDB settings once, right after a connection is opened.
+        
+        Args:
+            conn (duckdb.DuckDBPyConnection): Newly opened connection
+        """
+        settings = self._duckdb_settings
+        conn.execute(f"SET threads={settings['threads']}")
+        if settings['memory_limit'] is not None:
+            conn.execute(f"SET memory_limit='{settings['memory_limit']}'")
+        conn.execute(f"SET preserve_insertion_order={str(settings['preserve_insertion_order']).lower()}")
+        conn.execute(f"SET enable_object_cache={str(settings['enable_object_cache']).lower()}")
+        conn.execute("PRAGMA enable_progress_bar=false")
+        
+        logger.info(f"DuckDB configured: threads={settings['threads']}, "
+                    f"memory_limit={settings['memory_limit'] or 'default'}")
+    
+    def open_read_connection(self) -> duckdb.DuckDBPyConnection:
+        """
+        Switch the processor to a read-only connection for verification.
+        
+        Pending writes are checkpointed and the read-write connection is
+        closed, since DuckDB will not open the same file read-only and
+        read-write within one process. Afterwards queries run without write
+        transactions and other processes (e.g. a dashboard) can open the
+        database read-only as well. No more files can be processed.
+        
+        Returns:
+            duckdb.DuckDBPyConnection: The read-only connection
+        """
+        if self.read_conn is None:
+            if self.conn:
+                self.conn.execute("CHECKPOINT")
+                self.conn.close()
+                self.conn = None
+            self.read_conn = duckdb.connect(str(self.duckdb_path), read_only=True)
+            self._configure_connection(self.read_conn)
+            # Extensions loaded on the old connection must be loaded again;
+            # a failed install is not retried
+            if self._prewarm_available:
+                self._prewarm_available = None
+        return self.read_conn
+    
+    def _require_writer(self):
+        """Raise if the processor can no longer write to the database."""
+        if self.conn is None:
+            raise RuntimeError("processor switched to read-only")
+    
+    @property
+    def _query_conn(self) -> duckdb.DuckDBPyConnection:
+        """Connection for queries: the read-only one once it is open."""
+        return self.read_conn if self.read_conn is not None else self.conn
+    
+    @staticmethod
+    def _table_name(name: str) -> str:
+        """
+        Normalise a file stem or user-supplied name into a DuckDB table name.
+        
+        Args:
+            name (str): Raw name
+            
+        Returns:
+            str: Lower-case table name with spaces and dashes replaced
+        """
+        return name.lower().replace(' ', '_').replace('-', '_')
+    
     def find_csv_files(self, pattern: str = "*.csv") -> List[Path]:
         """
         Find CSV files in the data directory.
@@ -68,111 +204,374 @@ class QVDProcessor:
         logger.info(f"Found {len(csv_files)} CSV files")
         return csv_files
     
-    def process_csv_file(self, csv_path: Path) -> Dict[str, Any]:
+    def process_csv_file(self, csv_path: Path,
+                         cursor: Optional[duckdb.DuckDBPyConnection] = None) -> Dict[str, Any]:
         """
         Process a single CSV file.
         
+        Safe to call from worker threads: statements run on a cursor rather
+        than the shared connection, so results from concurrent loads never
+        interleave.
+        
         Args:
             csv_path (Path): Path to the CSV file
+            cursor (duckdb.DuckDBPyConnection, optional): Cursor to run on;
+                a temporary one is opened (and closed) if omitted
             
         Returns:
             Dict: Processing results and metadata
+            
+        Raises:
+            RuntimeError: If ``open_read_connection`` has been called
         """
+        self._require_writer()
         logger.info(f"Processing {csv_path.name}")
         
+        owns_cursor = cursor is None
+        if owns_cursor:
+            cursor = self.conn.cursor()
         try:
-            # Read CSV file
-            df = pd.read_csv(csv_path)
-            
-            # Get basic information
-            info = {
-                'file_name': csv_path.name,
-                'file_path': str(csv_path),
-                'rows': len(df),
-                'columns': len(df.columns),
-                'column_names': df.columns.tolist(),
-                'data_types': {str(k): str(v) for k, v in df.dtypes.to_dict().items()},
-                'memory_usage': int(df.memory_usage(deep=True).sum()),
-                'processed_at': datetime.now().isoformat()
-            }
-            
-            # Optimize data types
-            df_optimized = self._optimize_data_types(df)
+            table_name = self._table_name(csv_path.stem)
             
-            # Save as Parquet
-            parquet_path = self.output_dir / "parquet" / f"{csv_path.stem}.parquet"
-            df_optimized.to_parquet(parquet_path, index=False)
+            # Load the CSV in a single pass with DuckDB's parallel reader
+            schema_path = self.output_dir / "metadata" / f"{csv_path.stem}.schema.json"
+            schema_cached = self._load_csv(cursor, csv_path, table_name, schema_path)
             
-            # Update info with optimized data
-            info['optimized_memory_usage'] = int(df_optimized.memory_usage(deep=True).sum())
-            info['memory_savings'] = info['memory_usage'] - info['optimized_memory_usage']
-            info['parquet_path'] = str(parquet_path)
-            info['parquet_size_mb'] = round(parquet_path.stat().st_size / (1024 * 1024), 2)
+            info = self._table_summary(cursor, table_name, csv_path.name, csv_path,
+                                       csv_path.stat().st_size)
+            info['schema_cached'] = schema_cached
             
-            # Load into DuckDB
-            table_name = csv_path.stem.lower().replace(' ', '_').replace('-', '_')
-            self.conn.execute(f"DROP TABLE IF EXISTS {table_name}")
-            self.conn.execute(f"CREATE TABLE {table_name} AS SELECT * FROM '{parquet_path}'")
-            
-            info['duckdb_table'] = table_name
-            info['status'] = 'success'
+            # Export Parquet from the loaded table only when requested
+            if self.emit_parquet:
+                parquet_path = self.output_dir / "parquet" / f"{csv_path.stem}.parquet"
+                info.update(self._export_parquet(cursor, table_name, parquet_path, info))
             
             logger.info(f"✓ Processed {csv_path.name}: {info['rows']} rows, {info['columns']} columns")
             
+        except Exception as e:
+            logger.error(f"✗ Failed to process {csv_path.name}: {e}")
+            info = self._error_info(csv_path.name, csv_path, e)
+        
+        try:
+            self._record_processing(cursor, info)
             return info
+        finally:
+            if owns_cursor:
+                cursor.close()
+    
+    def process_csv_glob(self, pattern: str, table_name: str) -> Dict[str, Any]:
+        """
+        Load every CSV matching a pattern into one table with a single scan.
+        
+        Meant for homogeneous exports (e.g. one file per month): DuckDB
+        schedules all files across its threads at once, and a
+        ``source_file`` column records each row's source file for
+        downstream filtering. Columns are matched by name, so files may add
+        or omit columns. ``process_all_files`` loads every CSV in the data
+        directory as its own table, so keep such exports out of that run.
+        
+        Args:
+            pattern (str): File pattern relative to the data directory
+            table_name (str): Name of the combined table, normalised like
+                the per-file table names
+            
+        Returns:
+            Dict: Processing results and metadata
+            
+        Raises:
+            RuntimeError: If ``open_read_connection`` has been called
+        """
+        self._require_writer()
+        glob_path = self.data_dir / pattern
+        table_name = self._table_name(table_name)
+        logger.info(f"Processing {glob_path} into {table_name}")
+        
+        try:
+            self.conn.execute(
+                f"CREATE OR REPLACE TABLE {table_name} AS "
+                f"SELECT * FROM read_csv_auto(?, filename='source_file', union_by_name=true, "
+                f"parallel=true, sample_size=-1)",
+                [str(glob_path)]
+            )
+            
+            csv_paths = list(self.data_dir.glob(pattern))
+            info = self._table_summary(self.conn, table_name, pattern, glob_path,
+                                       sum(path.stat().st_size for path in csv_paths))
+            info['files'] = len(csv_paths)
+            
+            # Export Parquet from the combined table only when requested
+            if self.emit_parquet:
+                parquet_path = self.output_dir / "parquet" / f"{table_name}.parquet"
+                info.update(self._export_parquet(self.conn, table_name, parquet_path, info))
+            
+            logger.info(f"✓ Processed {pattern}: {info['files']} files, {info['rows']} rows")
             
         except Exception as e:
-            logger.error(f"✗ Failed to process {csv_path.name}: {e}")
-            return {
-                'file_name': csv_path.name,
-                'file_path': str(csv_path),
-                'status': 'error',
-                'error': str(e),
-                'processed_at': datetime.now().isoformat()
-            }
+            logger.error(f"✗ Failed to process {pattern}: {e}")
+            info = self._error_info(pattern, glob_path, e)
+        
+        self._record_processing(self.conn, info)
+        return info
+    
+    def _table_summary(self, cursor: duckdb.DuckDBPyConnection, table_name: str,
+                       file_name: str, file_path: Path, csv_size: int) -> Dict[str, Any]:
+        """
+        Build the success entry for a loaded table.
+        
+        Row count, column names and column types come from one query.
+        
+        Args:
+            cursor (duckdb.DuckDBPyConnection): Cursor to query on
+            table_name (str): Loaded table
+            file_name (str): Source file name (or glob pattern)
+            file_path (Path): Source file path (or glob path)
+            csv_size (int): Total size of the source CSV file(s) in bytes
+            
+        Returns:
+            Dict: Processing results and metadata
+        """
+        row_count, column_names, column_types = cursor.execute(
+            f"SELECT (SELECT COUNT(*) FROM {table_name}), list(column_name), list(column_type) "
+            f"FROM (DESCRIBE {table_name})"
+        ).fetchone()
+        
+        return {
+            'file_name': file_name,
+            'file_path': str(file_path),
+            'rows': row_count,
+            'columns': len(column_names),
+            'column_names': column_names,
+            'data_types': dict(zip(column_names, column_types)),
+            'csv_size': csv_size,
+            'processed_at': datetime.now().isoformat(),
+            'duckdb_table': table_name,
+            'status': 'success'
+        }
+    
+    @staticmethod
+    def _error_info(file_name: str, file_path: Path, error: Exception) -> Dict[str, Any]:
+        """Build the error entry for a source that failed to load."""
+        return {
+            'file_name': file_name,
+            'file_path': str(file_path),
+            'status': 'error',
+            'error': str(error),
+            'processed_at': datetime.now().isoformat()
+        }
+    
+    def _record_processing(self, cursor: duckdb.DuckDBPyConnection, info: Dict[str, Any]):
+        """
+        Upsert a file's processing result into the processing log table.
+        
+        Only that file's row is written, so the log does not have to be
+        rewritten on every run. Failures are logged and otherwise ignored.
+        
+        Args:
+            cursor (duckdb.DuckDBPyConnection): Cursor to run the insert on
+            info (Dict): Result returned by the processing method
+        """
+        try:
+            cursor.execute(
+                "INSERT OR REPLACE INTO metadata.processing_log VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    info['file_name'],
+                    info.get('rows'),
+                    info.get('columns'),
+                    info.get('parquet_size_mb'),
+                    datetime.fromisoformat(info['processed_at']),
+                    info['status'],
+                    info.get('error')
+                ]
+            )
+        except Exception as e:
+            logger.warning(f"Failed to record processing log for {info['file_name']}: {e}")
+    
+    def _process_with_cursor(self, worker_state: threading.local, cursors: List[duckdb.DuckDBPyConnection],
+                             csv_path: Path) -> Dict[str, Any]:
+        """
+        Process a CSV file on the calling worker thread's own cursor.
+        
+        Args:
+            worker_state (threading.local): Per-thread storage holding the cursor
+            cursors (List[duckdb.DuckDBPyConnection]): Every cursor opened so far
+            csv_path (Path): Path to the CSV file
+            
+        Returns:
+            Dict: Processing results and metadata
+        """
+        if not hasattr(worker_state, 'cursor'):
+            worker_state.cursor = self.conn.cursor()
+            cursors.append(worker_state.cursor)
+        return self.process_csv_file(csv_path, cursor=worker_state.cursor)
+    
+    def _export_parquet(self, cursor: duckdb.DuckDBPyConnection, table_name: str, parquet_path: Path,
+                        info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Export a table to Parquet, tuned for selective BI queries.
+        
+        Rows are sorted by the first date/timestamp column (if any) so each
+        row group covers a narrow range and min/max statistics let readers
+        skip row groups. Small ZSTD-compressed row groups keep that
+        skipping fine-grained; DuckDB dictionary-encodes low-cardinality
+        columns and writes column statistics by default.
+        
+        Args:
+            cursor (duckdb.DuckDBPyConnection): Cursor to run the export on
+            table_name (str): Table to export
+            parquet_path (Path): Destination file
+            info (Dict): The table's success entry from ``_table_summary``
+            
+        Returns:
+            Dict: Parquet path, size and compression ratio against the CSV
+        """
+        cluster_key = next(
+            (name for name, col_type in info['data_types'].items()
+             if col_type == 'DATE' or col_type.startswith('TIMESTAMP')),
+            None
+        )
+        order_by = f' ORDER BY {quote_identifier(cluster_key)}' if cluster_key else ''
+        
+        cursor.execute(
+            f"COPY (SELECT * FROM {table_name}{order_by}) TO ? "
+            f"(FORMAT PARQUET, COMPRESSION ZSTD, COMPRESSION_LEVEL 3, ROW_GROUP_SIZE 100000)",
+            [str(parquet_path)]
+        )
+        
+        parquet_size = parquet_path.stat().st_size
+        return {
+            'parquet_path': str(parquet_path),
+            'parquet_size': parquet_size,
+            'parquet_size_mb': round(parquet_size / (1024 * 1024), 2),
+            'compression_ratio': round(info['csv_size'] / max(parquet_size, 1), 2)
+        }
+    
+    def _load_csv(self, cursor: duckdb.DuckDBPyConnection, csv_path: Path,
+                  table_name: str, schema_path: Path) -> bool:
+        """
+        Load a CSV file into a DuckDB table, atomically replacing any
+        previous version so concurrent readers never see it missing.
+        
+        The file's dialect and column types are sniffed once (over the whole
+        file) and cached at ``schema_path``. Later runs whose header still
+        matches the cached column names read the file with those settings
+        and auto-detection disabled; otherwise the file is sniffed again.
+        
+        Args:
+            cursor (duckdb.DuckDBPyConnection): Cursor to run the load on
+            csv_path (Path): Path to the CSV file
+            table_name (str): Name of the table to create
+            schema_path (Path): Location of the cached schema
+            
+        Returns:
+            bool: True if the cached schema was used
+        """
+        cached = None
+        if schema_path.exists():
+            with open(schema_path, 'r') as f:
+                cached = json.load(f)
+            if 'dialect' not in cached:
+                cached = None
+        
+        if cached is not None:
+            if self._header_matches(csv_path, cached):
+                try:
+                    self._read_csv(cursor, csv_path, table_name, cached)
+                    return True
+                except duckdb.Error as e:
+                    error = str(e).splitlines()[0]
+                    logger.warning(f"Cached schema for {csv_path.name} no longer fits, re-detecting: {error}")
+            else:
+                logger.info(f"Header of {csv_path.name} changed, re-detecting schema")
+        
+        schema = self._sniff_csv(cursor, csv_path)
+        self._read_csv(cursor, csv_path, table_name, schema)
+        with open(schema_path, 'w') as f:
+            json.dump(schema, f, indent=2)
+        return False
     
-    def _optimize_data_types(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _sniff_csv(self, cursor: duckdb.DuckDBPyConnection, csv_path: Path) -> Dict[str, Any]:
         """
-        Optimize data types for memory efficiency.
+        Detect a CSV file's dialect and column types with DuckDB's sniffer.
+        
+        The whole file is sampled: a partial sample misses values that only
+        turn non-numeric late in the file, and the load then fails on them.
         
         Args:
-            df (pd.DataFrame): Input DataFrame
+            cursor (duckdb.DuckDBPyConnection): Cursor to run the sniffer on
+            csv_path (Path): Path to the CSV file
             
         Returns:
-            pd.DataFrame: Optimized DataFrame
-        """
-        df_optimized = df.copy()
-        
-        for col in df_optimized.columns:
-            col_type = df_optimized[col].dtype
-            
-            if col_type == 'object':
-                # Try to convert to category if it has few unique values
-                if df_optimized[col].nunique() / len(df_optimized) < 0.5:
-                    df_optimized[col] = df_optimized[col].astype('category')
-            
-            elif col_type == 'int64':
-                # Downcast integers
-                if df_optimized[col].min() >= 0:
-                    if df_optimized[col].max() < 255:
-                        df_optimized[col] = df_optimized[col].astype('uint8')
-                    elif df_optimized[col].max() < 65535:
-                        df_optimized[col] = df_optimized[col].astype('uint16')
-                    elif df_optimized[col].max() < 4294967295:
-                        df_optimized[col] = df_optimized[col].astype('uint32')
-                else:
-                    if df_optimized[col].min() > -128 and df_optimized[col].max() < 127:
-                        df_optimized[col] = df_optimized[col].astype('int8')
-                    elif df_optimized[col].min() > -32768 and df_optimized[col].max() < 32767:
-                        df_optimized[col] = df_optimized[col].astype('int16')
-                    elif df_optimized[col].min() > -2147483648 and df_optimized[col].max() < 2147483647:
-                        df_optimized[col] = df_optimized[col].astype('int32')
-            
-            elif col_type == 'float64':
-                # Downcast floats
-                df_optimized[col] = pd.to_numeric(df_optimized[col], downcast='float')
-        
-        return df_optimized
+            Dict: ``dialect`` options for ``read_csv`` and ``columns`` mapping names to types
+        """
+        delimiter, quote, escape, skip, header, columns, date_format, timestamp_format = cursor.execute(
+            "SELECT Delimiter, Quote, Escape, SkipRows, HasHeader, Columns, DateFormat, TimestampFormat "
+            "FROM sniff_csv(?, sample_size=-1)",
+            [str(csv_path)]
+        ).fetchone()
+        
+        # The sniffer reports "no quote/escape character" as '(empty)'
+        dialect = {
+            'delim': delimiter,
+            'quote': '' if quote == '(empty)' else quote,
+            'escape': '' if escape == '(empty)' else escape,
+            'skip': skip,
+            'header': header
+        }
+        if date_format:
+            dialect['dateformat'] = date_format
+        if timestamp_format:
+            dialect['timestampformat'] = timestamp_format
+        
+        return {
+            'dialect': dialect,
+            'columns': {col['name']: col['type'] for col in columns}
+        }
+    
+    def _read_csv(self, cursor: duckdb.DuckDBPyConnection, csv_path: Path,
+                  table_name: str, schema: Dict[str, Any]):
+        """
+        Create a table from a CSV file using an explicit dialect and schema.
+        
+        Args:
+            cursor (duckdb.DuckDBPyConnection): Cursor to run the load on
+            csv_path (Path): Path to the CSV file
+            table_name (str): Name of the table to create
+            schema (Dict): Dialect and columns as returned by ``_sniff_csv``
+        """
+        dialect = schema['dialect']
+        options = ''.join(f", {option}=?" for option in dialect)
+        cursor.execute(
+            f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM read_csv(?, auto_detect=false, "
+            f"parallel=true, columns=?{options})",
+            [str(csv_path), schema['columns'], *dialect.values()]
+        )
+    
+    def _header_matches(self, csv_path: Path, schema: Dict[str, Any]) -> bool:
+        """
+        Check that a CSV file's header still names the cached columns.
+        
+        Files without a header cannot be checked and are assumed to match;
+        a changed layout then surfaces as a load error instead.
+        
+        Args:
+            csv_path (Path): Path to the CSV file
+            schema (Dict): Cached dialect and columns
+            
+        Returns:
+            bool: True if the header matches the cached column names
+        """
+        dialect = schema['dialect']
+        if not dialect['header']:
+            return True
+        
+        quoting = {'quotechar': dialect['quote']} if dialect['quote'] else {'quoting': csv.QUOTE_NONE}
+        with open(csv_path, 'r', newline='', encoding='utf-8-sig', errors='replace') as f:
+            reader = csv.reader(f, delimiter=dialect['delim'], **quoting)
+            for _ in range(dialect['skip']):
+                next(reader, None)
+            header = next(reader, [])
+        
+        return header == list(schema['columns'])
     
     def process_all_files(self) -> Dict[str, Any]:
         """
@@ -180,7 +579,11 @@ class QVDProcessor:
         
         Returns:
             Dict: Processing summary
+            
+        Raises:
+            RuntimeError: If ``open_read_connection`` has been called
         """
+        self._require_writer()
         logger.info("Starting batch processing of CSV files")
         
         csv_files = self.find_csv_files()
@@ -188,14 +591,27 @@ class QVDProcessor:
             logger.warning("No CSV files found in data directory")
             return {'status': 'no_files', 'files_processed': 0}
         
-        results = []
         successful = 0
         failed = 0
         
-        for csv_file in csv_files:
-            result = self.process_csv_file(csv_file)
-            results.append(result)
-            
+        # Files load into distinct tables, so they can be processed concurrently.
+        # Each worker thread reuses one cursor; self.conn stays on this thread.
+        # Sizing the pool to DuckDB's thread count keeps every engine thread
+        # busy when many small files each parallelize poorly on their own.
+        max_workers = max(1, min(self._duckdb_settings['threads'], len(csv_files)))
+        worker_state = threading.local()
+        cursors = []
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(
+                    lambda csv_file: self._process_with_cursor(worker_state, cursors, csv_file),
+                    csv_files
+                ))
+        finally:
+            for cursor in cursors:
+                cursor.close()
+        
+        for result in results:
             if result['status'] == 'success':
                 successful += 1
             else:
@@ -212,6 +628,8 @@ class QVDProcessor:
             'files': results
         }
         
+        # This run's summary for non-SQL consumers; the full per-file history
+        # lives in metadata.processing_log
         metadata_path = self.output_dir / "metadata" / "processing_metadata.json"
         with open(metadata_path, 'w') as f:
             json.dump(metadata, f, indent=2)
@@ -223,11 +641,65 @@ class QVDProcessor:
         
         return metadata
     
-    def _create_schema_documentation(self):
-        """Create schema documentation for the DuckDB database."""
+    def prewarm_tables(self, table_names: Optional[List[str]] = None):
+        """
+        Prefetch table blocks so the first query against each table is warm.
+        
+        Does nothing unless the processor was created with ``prewarm=True``.
+        Uses the ``cache_prewarm`` community extension. Prewarming is a
+        best-effort optimization: if the extension cannot be installed
+        (e.g. no network access) it is skipped for the processor's lifetime.
+        
+        Args:
+            table_names (List[str], optional): Tables to prewarm, defaults to all tables
+        """
+        if not self.prewarm:
+            return
+        
+        if self._prewarm_available is None:
+            try:
+                self._query_conn.execute("INSTALL cache_prewarm FROM community; LOAD cache_prewarm")
+                self._prewarm_available = True
+            except Exception as e:
+                logger.warning(f"cache_prewarm extension unavailable, skipping prewarm: {e}")
+                self._prewarm_available = False
+        
+        if not self._prewarm_available:
+            return
+        
+        if table_names is None:
+            table_names = [table[0] for table in self._query_conn.execute("SHOW TABLES").fetchall()]
+        
+        for table_name in table_names:
+            try:
+                self._query_conn.execute("SELECT prewarm(?, 'prefetch')", [table_name])
+            except Exception as e:
+                logger.warning(f"Failed to prewarm {table_name}: {e}")
+    
+    def _create_schema_documentation(self, exact_counts: bool = False):
+        """
+        Create schema documentation for the DuckDB database.
+        
+        Columns and row counts for every table come from the catalog in a
+        single query. Row counts use DuckDB's stored ``estimated_size``,
+        which is exact for freshly loaded tables; pass ``exact_counts=True``
+        to run ``COUNT(*)`` per table instead.
+        
+        Args:
+            exact_counts (bool): Count rows with a full scan of each table
+        """
         try:
-            # Get all tables
-            tables = self.conn.execute("SHOW TABLES").fetchall()
+            rows = self.conn.execute("""
+                SELECT t.table_name, t.estimated_size, c.column_name, c.data_type
+                FROM duckdb_tables() t
+                JOIN information_schema.columns c
+                  ON c.table_catalog = t.database_name
+                 AND c.table_schema = t.schema_name
+                 AND c.table_name = t.table_name
+                WHERE t.database_name = current_database()
+                  AND t.schema_name = current_schema()
+                ORDER BY t.table_name, c.ordinal_position
+            """).fetchall()
             
             schema_info = {
                 'database_path': str(self.duckdb_path),
@@ -235,19 +707,15 @@ class QVDProcessor:
                 'created_at': datetime.now().isoformat()
             }
             
-            for table in tables:
-                table_name = table[0]
-                
-                # Get table schema
-                schema = self.conn.execute(f"DESCRIBE {table_name}").fetchall()
-                
-                # Get row count
-                count = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-                
-                schema_info['tables'][table_name] = {
-                    'columns': [{'name': col[0], 'type': col[1]} for col in schema],
-                    'row_count': count
-                }
+            for table_name, estimated_size, column_name, data_type in rows:
+                table = schema_info['tables'].setdefault(
+                    table_name, {'columns': [], 'row_count': estimated_size}
+                )
+                table['columns'].append({'name': column_name, 'type': data_type})
+            
+            if exact_counts:
+                for table_name, table in schema_info['tables'].items():
+                    table['row_count'] = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
             
             # Save schema documentation
             schema_path = self.output_dir / "metadata" / "database_schema.json"
@@ -263,6 +731,9 @@ class QVDProcessor:
         """
         Get information about a specific table.
         
+        The sample only covers the first five columns so wide tables are
+        not read in full.
+        
         Args:
             table_name (str): Name of the table
             
@@ -271,11 +742,12 @@ class QVDProcessor:
         """
         try:
             # Get basic info
-            count = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-            schema = self.conn.execute(f"DESCRIBE {table_name}").fetchall()
+            count = self._query_conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            schema = self._query_conn.execute(f"DESCRIBE {table_name}").fetchall()
             
-            # Get sample data
-            sample = self.conn.execute(f"SELECT * FROM {table_name} LIMIT 5").fetchall()
+            # Get sample data, projecting only the first few columns
+            sample_columns = ', '.join(quote_identifier(col[0]) for col in schema[:5])
+            sample = self._query_conn.execute(f"SELECT {sample_columns} FROM {table_name} LIMIT 5").fetchall()
             
             return {
                 'table_name': table_name,
@@ -288,27 +760,66 @@ class QVDProcessor:
             logger.error(f"Failed to get table info for {table_name}: {e}")
             return {'error': str(e)}
     
-    def query_data(self, query: str) -> pd.DataFrame:
+    def query_arrow(self, query: str) -> pa.Table:
         """
-        Execute a query on the DuckDB database.
+        Execute a query on the DuckDB database and return an Arrow table.
+        
+        DuckDB hands results to Arrow without copying, so this is the
+        cheapest way to feed Polars, Plotly or Parquet writers. Name the
+        columns you need rather than using ``SELECT *``: storage is
+        columnar, so only the projected columns are read.
         
         Args:
             query (str): SQL query
             
         Returns:
-            pd.DataFrame: Query results
+            pa.Table: Query results
         """
+        if re.search(r'select\s+\*', query, re.IGNORECASE):
+            logger.warning("SELECT * prevents column pruning; name the columns you need")
+        
         try:
-            result = self.conn.execute(query).fetchdf()
+            result = self._query_conn.execute(query).arrow()
+            # Newer DuckDB releases return a stream rather than a table
+            if isinstance(result, pa.RecordBatchReader):
+                result = result.read_all()
             return result
         except Exception as e:
             logger.error(f"Query failed: {e}")
-            return pd.DataFrame()
+            return pa.table({})
+    
+    def query_data(self, query: str) -> pd.DataFrame:
+        """
+        Execute a query on the DuckDB database and return a DataFrame.
+        
+        Columns are Arrow-backed (``pd.ArrowDtype``), so strings are not
+        converted to Python objects and Arrow buffers are released as each
+        column is converted. Use ``query_arrow`` when a pandas object is
+        not needed, and name columns explicitly instead of ``SELECT *`` so
+        only those columns are read.
+        
+        Args:
+            query (str): SQL query
+            
+        Returns:
+            pd.DataFrame: Query results
+        """
+        return self.query_arrow(query).to_pandas(
+            types_mapper=pd.ArrowDtype,
+            zero_copy_only=False,
+            split_blocks=True,
+            self_destruct=True
+        )
     
     def close(self):
-        """Close the DuckDB connection."""
+        """Close the DuckDB connections."""
+        if self.read_conn:
+            self.read_conn.close()
+            self.read_conn = None
+            logger.info("DuckDB read-only connection closed")
         if self.conn:
             self.conn.close()
+            self.conn = None
             logger.info("DuckDB connection closed")
 
 
@@ -10,8 +10,12 @@ Date: 2024
 
 import os
 import sys
+import json
+import shutil
+import duckdb
 import pandas as pd
 import tempfile
+from contextlib import contextmanager
 from pathlib import Path
 
 # Add the parent directory to the path so we can import our modules
@@ -77,7 +81,8 @@ def test_qvd_processor():
     # Initialize processor
     processor = QVDProcessor(
         data_dir=str(csv_dir),
-        output_dir="./test_output"
+        output_dir="./test_output",
+        emit_parquet=True
     )
     
     try:
@@ -98,8 +103,8 @@ def test_qvd_processor():
         for file_info in results['files']:
             if file_info['status'] == 'success':
                 print(f"✓ {file_info['file_name']}: {file_info['rows']} rows, {file_info['columns']} columns")
-                print(f"  Memory savings: {file_info['memory_savings']:,} bytes")
                 print(f"  Parquet size: {file_info['parquet_size_mb']:.2f} MB")
+                print(f"  Compression ratio: {file_info['compression_ratio']:.1f}x")
             else:
                 print(f"✗ {file_info['file_name']}: {file_info['error']}")
         
@@ -180,6 +185,181 @@ def test_qvd_processor():
         print(f"\nCleaned up test data from: {csv_dir}")
 
 
+@contextmanager
+def temporary_processor(**kwargs):
+    """Yield a scratch data directory and a processor writing below it."""
+    temp_dir = Path(tempfile.mkdtemp())
+    processor = QVDProcessor(data_dir=str(temp_dir), output_dir=str(temp_dir / "processed"), **kwargs)
+    try:
+        yield temp_dir, processor
+    finally:
+        processor.close()
+        shutil.rmtree(temp_dir)
+
+
+def test_schema_cache():
+    """Test that a cached schema is reused and refreshed when stale."""
+    print("Testing schema cache...")
+    
+    with temporary_processor() as (temp_dir, processor):
+        csv_path = temp_dir / "Orders.csv"
+        pd.DataFrame({'OrderID': [1, 2, 3], 'Amount': [9.5, 3.0, 4.25]}).to_csv(csv_path, index=False)
+        
+        first = processor.process_csv_file(csv_path)
+        assert first['status'] == 'success'
+        assert not first['schema_cached']
+        assert (temp_dir / "processed" / "metadata" / "Orders.schema.json").exists()
+        
+        second = processor.process_csv_file(csv_path)
+        assert second['schema_cached']
+        assert second['data_types'] == first['data_types']
+        
+        # A new column invalidates the cached schema
+        pd.DataFrame({'OrderID': [1], 'Amount': [1.0], 'Region': ['North']}).to_csv(csv_path, index=False)
+        third = processor.process_csv_file(csv_path)
+        assert third['status'] == 'success'
+        assert not third['schema_cached']
+        assert third['columns'] == 3
+        
+        # Renamed columns with the same count and types must not keep old names
+        pd.DataFrame({'CustomerID': [1], 'Price': [1.0], 'Region': ['North']}).to_csv(csv_path, index=False)
+        fourth = processor.process_csv_file(csv_path)
+        assert not fourth['schema_cached']
+        assert fourth['column_names'] == ['CustomerID', 'Price', 'Region']
+    
+    print("✓ Schema cache test completed successfully!")
+
+
+def test_schema_cache_dialect():
+    """Test that the cached schema covers delimiter and date format."""
+    print("Testing schema cache dialect...")
+    
+    with temporary_processor() as (temp_dir, processor):
+        csv_path = temp_dir / "Visits.csv"
+        csv_path.write_text("VisitID;Day\n1;15/01/2024\n2;16/01/2024\n")
+        
+        first = processor.process_csv_file(csv_path)
+        assert first['data_types'] == {'VisitID': 'BIGINT', 'Day': 'DATE'}
+        
+        second = processor.process_csv_file(csv_path)
+        assert second['schema_cached']
+        assert second['data_types'] == first['data_types']
+    
+    print("✓ Schema cache dialect test completed successfully!")
+
+
+def test_quoted_column_names():
+    """Test that column names containing double quotes can be sampled."""
+    print("Testing quoted column names...")
+    
+    with temporary_processor() as (temp_dir, processor):
+        csv_path = temp_dir / "Sizes.csv"
+        csv_path.write_text('id,"Size 12"" pipe"\n1,4.5\n2,6.0\n')
+        
+        result = processor.process_csv_file(csv_path)
+        assert result['column_names'] == ['id', 'Size 12" pipe']
+        
+        info = processor.get_table_info("sizes")
+        assert info['row_count'] == 2
+        assert info['sample_data'] == [(1, 4.5), (2, 6.0)]
+    
+    # The Parquet export sorts by the date column, which must be quoted too
+    with temporary_processor(emit_parquet=True) as (temp_dir, processor):
+        csv_path = temp_dir / "Events.csv"
+        csv_path.write_text('"Event ""Day""",id\n2024-01-02,1\n2024-01-01,2\n')
+        
+        result = processor.process_csv_file(csv_path)
+        assert result['status'] == 'success'
+        assert Path(result['parquet_path']).exists()
+    
+    print("✓ Quoted column names test completed successfully!")
+
+
+def test_late_type_change():
+    """Test that a value past the sniffer's default sample still loads."""
+    print("Testing late type change...")
+    
+    with temporary_processor() as (temp_dir, processor):
+        csv_path = temp_dir / "Codes.csv"
+        codes = [str(i) for i in range(200_000)] + ['A12']
+        pd.DataFrame({'id': range(len(codes)), 'code': codes}).to_csv(csv_path, index=False)
+        
+        result = processor.process_csv_file(csv_path)
+        assert result['status'] == 'success'
+        assert result['rows'] == 200_001
+        assert result['data_types']['code'] == 'VARCHAR'
+    
+    print("✓ Late type change test completed successfully!")
+
+
+def test_read_only_connection():
+    """Test that verification queries work over the read-only connection."""
+    print("Testing read-only connection...")
+    
+    with temporary_processor() as (temp_dir, processor):
+        pd.DataFrame({'OrderID': [1, 2, 3]}).to_csv(temp_dir / "Orders.csv", index=False)
+        
+        processor.process_all_files()
+        read_conn = processor.open_read_connection()
+        
+        with open(temp_dir / "processed" / "metadata" / "processing_metadata.json") as f:
+            metadata = json.load(f)
+        assert metadata['processing_summary']['successful'] == 1
+        assert [file_info['file_name'] for file_info in metadata['files']] == ['Orders.csv']
+        
+        assert processor.conn is None
+        assert processor.get_table_info("orders")['row_count'] == 3
+        assert processor.query_arrow("SELECT OrderID FROM orders").num_rows == 3
+        
+        log = processor.query_arrow("SELECT file_name, rows, status FROM metadata.processing_log").to_pylist()
+        assert log == [{'file_name': 'Orders.csv', 'rows': 3, 'status': 'success'}]
+        
+        try:
+            read_conn.execute("CREATE TABLE scratch (id INTEGER)")
+            assert False, "read-only connection accepted a write"
+        except duckdb.Error:
+            pass
+        
+        for write in (processor.process_all_files,
+                      lambda: processor.process_csv_file(temp_dir / "Orders.csv"),
+                      lambda: processor.process_csv_glob("*.csv", "orders")):
+            try:
+                write()
+                assert False, "processor wrote after switching to read-only"
+            except RuntimeError as e:
+                assert str(e) == "processor switched to read-only"
+    
+    print("✓ Read-only connection test completed successfully!")
+
+
+def test_process_csv_glob():
+    """Test loading several homogeneous CSV files into one table."""
+    print("Testing multi-file load...")
+    
+    with temporary_processor(emit_parquet=True) as (temp_dir, processor):
+        for month in range(1, 4):
+            pd.DataFrame({
+                'OrderID': [month * 10 + i for i in range(month)],
+                'Amount': [1.5 * i for i in range(month)],
+                'filename': [f"order_{month}.pdf"] * month
+            }).to_csv(temp_dir / f"Orders_2024_{month:02d}.csv", index=False)
+        
+        result = processor.process_csv_glob("Orders_*.csv", "Orders 2024")
+        assert result['status'] == 'success'
+        assert result['duckdb_table'] == 'orders_2024'
+        assert result['files'] == 3
+        assert result['rows'] == 6
+        assert 'filename' in result['column_names']
+        assert 'source_file' in result['column_names']
+        assert Path(result['parquet_path']).exists()
+    
+    print("✓ Multi-file load test completed successfully!")
+
 if __name__ == "__main__":
     test_qvd_processor()
-
+    test_schema_cache()
+    test_schema_cache_dialect()
+    test_quoted_column_names()
+    test_late_type_change()
+    test_read_only_connection()
+    test_process_csv_glob()